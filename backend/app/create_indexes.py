@@ -0,0 +1,21 @@
+"""
+Create the secondary indexes on the pipeline-owned tables.
+
+create_all skips indexes on tables that already exist, and building them on a
+large table is too slow for startup, so run this once after the pipeline
+creates or rebuilds the tables:
+
+    python -m app.create_indexes
+"""
+import asyncio
+from .db import get_engine
+from .models import create_indexes
+
+async def main():
+    engine = await get_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(create_indexes)
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
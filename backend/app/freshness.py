@@ -0,0 +1,91 @@
+import os
+import time
+import asyncio
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from sqlalchemy import select, func
+from .db import DB_CONNECT_TIMEOUT
+from .models import pipeline_runs
+
+# Seconds the last pipeline refresh time is trusted before it is re-read
+REFRESH_CHECK_INTERVAL = int(os.environ.get("REFRESH_CHECK_INTERVAL", "60"))
+
+LAST_REFRESH_STMT = select(func.max(pipeline_runs.c.refreshed_at))
+
+_last_refresh = None
+_last_refresh_checked = None
+
+async def read_last_refresh(engine):
+    """Read the latest pipeline refresh time from MySQL."""
+    async with engine.connect() as conn:
+        refreshed_at = (await conn.execute(LAST_REFRESH_STMT)).scalar_one_or_none()
+    # refreshed_at is stored as naive UTC
+    return refreshed_at.replace(tzinfo=timezone.utc, microsecond=0) if refreshed_at else None
+
+async def get_last_refresh(engine):
+    """Get when the batch pipeline last refreshed the aggregate tables."""
+    global _last_refresh, _last_refresh_checked
+    now = time.monotonic()
+    if _last_refresh_checked is None or now - _last_refresh_checked >= REFRESH_CHECK_INTERVAL:
+        # Record the check even if it fails so a down database isn't retried on every call
+        _last_refresh_checked = now
+        try:
+            _last_refresh = await asyncio.wait_for(read_last_refresh(engine), timeout=DB_CONNECT_TIMEOUT)
+        except Exception as e:
+            print(f"Failed to read pipeline refresh time, keeping {_last_refresh}: {e!r}")
+    return _last_refresh
+
+def freshness_headers(refreshed_at):
+    """Build the validator headers for data last refreshed at refreshed_at."""
+    return {
+        "ETag": f'W/"{int(refreshed_at.timestamp())}"',
+        "Last-Modified": format_datetime(refreshed_at, usegmt=True),
+    }
+
+def is_not_modified(request_headers, headers, refreshed_at):
+    """Check whether the client's cached copy is still current."""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        # "*" is not honoured: the route may still answer 404 for these params
+        etags = [tag.strip() for tag in if_none_match.split(",")]
+        return headers["ETag"] in etags
+    
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        return refreshed_at <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+class ConditionalGetMiddleware:
+    """Answer conditional GETs on the data routes from the refresh time being served."""
+
+    def __init__(self, app, paths, get_refreshed_at):
+        self.app = app
+        self.paths = paths
+        self.get_refreshed_at = get_refreshed_at
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or not self.paths.fullmatch(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        
+        refreshed_at = self.get_refreshed_at()
+        # Always revalidate; unchanged data costs a 304
+        headers = {"Cache-Control": "no-cache"}
+        if refreshed_at is not None:
+            headers.update(freshness_headers(refreshed_at))
+            # Unchanged data skips the query entirely
+            if is_not_modified(Headers(scope=scope), headers, refreshed_at):
+                await Response(status_code=304, headers=headers)(scope, receive, send)
+                return
+        
+        async def send_with_validators(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
+        
+        await self.app(scope, receive, send_with_validators)
\ No newline at end of file
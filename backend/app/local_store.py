@@ -0,0 +1,100 @@
+import os
+import time
+import asyncio
+from datetime import datetime
+import duckdb
+import pyarrow as pa
+from sqlalchemy import select
+from .freshness import get_last_refresh, REFRESH_CHECK_INTERVAL
+from .models import (
+    demand_heatmap, tip_trends, trip_performance, popular_routes, payment_analysis
+)
+
+# Aggregate tables small enough to mirror in process; fare_anomalies holds
+# individual trips and stays in MySQL
+LOCAL_TABLES = [demand_heatmap, tip_trends, trip_performance, popular_routes, payment_analysis]
+
+# The local copies are reloaded whenever the pipeline refresh time advances.
+# Setting this to a number of seconds also reloads them unconditionally at that
+# interval. It defaults to 0, which turns the unconditional reload off
+LOCAL_REFRESH_INTERVAL = int(os.environ.get("LOCAL_REFRESH_INTERVAL", "0"))
+
+# Rows per batch when copying a table out of MySQL
+FETCH_YIELD_PER = 10000
+
+ARROW_TYPES = {
+    int: pa.int64(),
+    float: pa.float64(),
+    str: pa.string(),
+    datetime: pa.timestamp("us"),
+}
+
+_conn = None
+_loaded_refresh = None
+_loaded_at = None
+
+async def fetch_as_arrow(engine, table):
+    """Read a whole table from MySQL into an Arrow table, one batch at a time."""
+    schema = pa.schema([(col.name, ARROW_TYPES[col.type.python_type]) for col in table.columns])
+    batches = []
+    async with engine.connect() as conn:
+        result = await conn.stream(select(table).execution_options(yield_per=FETCH_YIELD_PER))
+        async for rows in result.partitions():
+            batches.append(pa.record_batch(
+                [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)],
+                schema=schema,
+            ))
+    return pa.Table.from_batches(batches, schema=schema)
+
+def build_store(arrow_tables):
+    """Create an in-memory DuckDB database holding the given Arrow tables."""
+    conn = duckdb.connect(":memory:")
+    for name, arrow_table in arrow_tables.items():
+        conn.register("staging", arrow_table)
+        conn.execute(f"CREATE TABLE {name} AS SELECT * FROM staging")
+        conn.unregister("staging")
+    return conn
+
+async def load_store(engine):
+    """Load the aggregate tables from MySQL into a fresh in-memory database."""
+    global _conn, _loaded_refresh, _loaded_at
+    # Read the refresh time first so the copied tables are at least that new
+    refreshed_at = await get_last_refresh(engine)
+    arrow_tables = {table.name: await fetch_as_arrow(engine, table) for table in LOCAL_TABLES}
+    # Swap in the new database only once it is fully built
+    old_conn, _conn = _conn, await asyncio.to_thread(build_store, arrow_tables)
+    if old_conn is not None:
+        old_conn.close()
+    _loaded_refresh = refreshed_at
+    _loaded_at = time.monotonic()
+
+def loaded_refresh():
+    """Get the pipeline refresh time the local tables were loaded at."""
+    return _loaded_refresh
+
+async def refresh_store(engine):
+    """Reload the local tables when the pipeline refreshes them."""
+    while True:
+        await asyncio.sleep(REFRESH_CHECK_INTERVAL)
+        try:
+            refreshed_at = await get_last_refresh(engine)
+            interval_elapsed = (
+                LOCAL_REFRESH_INTERVAL > 0 and time.monotonic() - _loaded_at >= LOCAL_REFRESH_INTERVAL
+            )
+            if refreshed_at != _loaded_refresh or interval_elapsed:
+                await load_store(engine)
+        except Exception as e:
+            print(f"Failed to refresh local tables: {e}")
+
+def close_store():
+    """Close the local database."""
+    global _conn
+    if _conn is not None:
+        _conn.close()
+        _conn = None
+
+def query(sql, params=()):
+    """Run a query against the local tables and return rows as dicts."""
+    cursor = _conn.execute(sql, params)
+    columns = [desc[0] for desc in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
\ No newline at end of file
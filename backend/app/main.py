@@ -1,156 +1,373 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, inspect, distinct, and_, desc
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import select, func, literal, union_all, bindparam, table, column
+from . import local_store
+from .freshness import ConditionalGetMiddleware
 from .models import (
-    demand_heatmap, tip_trends, fare_anomalies, trip_performance,
-    popular_routes, payment_analysis,
-    get_session, init_models, get_engine
+    demand_heatmap, tip_trends, fare_anomalies, WEEKEND_DAYS,
+    init_models, get_engine
 )
-import json
+import re
+import asyncio
+import orjson
 from pathlib import Path
 import os
 
-app = FastAPI()
+# Handlers return ORJSONResponse themselves so FastAPI skips its
+# jsonable_encoder pass over the rows
+app = FastAPI(default_response_class=ORJSONResponse)
 
-# Add CORS middleware
+# Routes serving pipeline data; debug and unknown paths never get validators
+DATA_ROUTES = re.compile(
+    r"/api/(demand|tips|anomalies)"
+    r"|/api/(tips|trip-performance|popular-routes|payment-analysis)/-?\d+"
+)
+
+# Validators follow the refresh the local tables were loaded at, so they
+# only change once the new data is actually served
+app.add_middleware(
+    ConditionalGetMiddleware,
+    paths=DATA_ROUTES,
+    get_refreshed_at=local_store.loaded_refresh,
+)
+
+# Compress JSON bodies; level 1 keeps CPU cost low on repetitive keys
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=1)
+
+# Add CORS middleware last so it wraps every response, including early 304s
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # In production, replace with your frontend domain
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Link"],  # Paged endpoints point at the next page here
+)
+
+# Query templates, built once at import; per-request values are bound at execution
+TIPS_STMT = (
+    select(tip_trends)
+    .order_by(tip_trends.c.PULocationID, tip_trends.c.payment_type)
+    .limit(bindparam("limit"))
+    .offset(bindparam("offset"))
+)
+
+# Whether any tip trends row exists at the given offset
+TIPS_ROW_AT_STMT = (
+    select(literal(1))
+    .select_from(tip_trends)
+    .limit(1)
+    .offset(bindparam("offset"))
+)
+
+# Format the timestamp in MySQL so rows are serialized as-is
+ANOMALIES_STMT = (
+    select(
+        fare_anomalies.c.VendorID,
+        func.date_format(
+            fare_anomalies.c.tpep_pickup_datetime, "%Y-%m-%dT%H:%i:%s"
+        ).label("pickup_datetime"),
+        fare_anomalies.c.PULocationID,
+        fare_anomalies.c.DOLocationID,
+        fare_anomalies.c.fare_amount,
+        fare_anomalies.c.tip_amount,
+        fare_anomalies.c.trip_distance,
+    )
+    .order_by(fare_anomalies.c.fare_amount.desc())
+    .limit(100)
+)
+
+# Queries against the in-process copies of the aggregate tables (see local_store)
+DEMAND_SQL = """
+    SELECT PULocationID, n_trips
+    FROM demand_heatmap
+    WHERE pickup_hour = ?
+    ORDER BY PULocationID
+    LIMIT ? OFFSET ?
+"""
+
+# Average across all payment types for a zone
+TIP_FOR_ZONE_SQL = """
+    SELECT AVG(avg_tip_pct) AS average
+    FROM tip_trends
+    WHERE PULocationID = ?
+"""
+
+# is_weekend is derived from pickup_dow rather than stored per row
+WEEKEND_DAYS_SQL = ", ".join(map(str, WEEKEND_DAYS))
+TRIP_PERFORMANCE_SQL = f"""
+    SELECT pickup_hour, pickup_dow, avg_trip_duration, avg_speed,
+        avg_revenue_per_mile, avg_fare, total_revenue, n_trips,
+        avg_trip_distance, avg_tip, avg_tip_percentage,
+        pickup_dow IN ({WEEKEND_DAYS_SQL}) AS is_weekend
+    FROM trip_performance
+    WHERE PULocationID = ?
+"""
+
+POPULAR_ROUTES_SQL = """
+    SELECT DOLocationID, pickup_hour, n_trips, avg_duration, avg_fare,
+        avg_distance, avg_tip
+    FROM popular_routes
+    WHERE PULocationID = ?
+"""
+
+PAYMENT_ANALYSIS_SQL = """
+    SELECT pickup_hour, payment_type, payment_method, n_trips, avg_fare,
+        avg_tip, avg_tip_percentage, total_revenue
+    FROM payment_analysis
+    WHERE PULocationID = ?
+"""
+
+# Column metadata for the tables shown by the schema debug endpoint
+SCHEMA_TABLES = ["demand_heatmap", "tip_trends", "fare_anomalies"]
+information_schema_columns = table(
+    "columns",
+    column("table_schema"),
+    column("table_name"),
+    column("column_name"),
+    column("column_type"),
+    column("ordinal_position"),
+    schema="information_schema",
+)
+SCHEMA_STMT = (
+    select(
+        information_schema_columns.c.table_name,
+        information_schema_columns.c.column_name,
+        information_schema_columns.c.column_type,
+    )
+    .where(
+        information_schema_columns.c.table_schema == func.database(),
+        information_schema_columns.c.table_name.in_(SCHEMA_TABLES),
+    )
+    .order_by(
+        information_schema_columns.c.table_name,
+        information_schema_columns.c.ordinal_position,
+    )
 )
 
+# Possible locations of the taxi zones GeoJSON file
+TAXI_ZONES_PATHS = [
+    Path("frontend/public/taxi_zones.geojson"),  # Local development
+    Path("/app/frontend/public/taxi_zones.geojson"),  # Docker container
+    Path("../frontend/public/taxi_zones.geojson"),  # Relative to backend
+]
+
+# Taxi zones file contents, loaded once at startup
+_ZONES_PATH = None
+_ZONES_RAW = None
+_ZONES_JSON = None
+_ZONES_MIN = None
+_ZONES_MAX = None
+_ZONES_PREVIEW = None
+_ZONES_JSON_PREVIEW = None
+
+def load_taxi_zones():
+    """Read and parse the taxi zones GeoJSON file into module globals."""
+    global _ZONES_PATH, _ZONES_RAW, _ZONES_JSON, _ZONES_MIN, _ZONES_MAX
+    global _ZONES_PREVIEW, _ZONES_JSON_PREVIEW
+    path = next((p for p in TAXI_ZONES_PATHS if p.exists()), None)
+    if path is None:
+        print("Taxi zones file not found; zone debug endpoints will return 404")
+        return
+    
+    _ZONES_PATH = path
+    _ZONES_RAW = path.read_bytes()
+    content = _ZONES_RAW.decode("utf-8", errors="replace")
+    _ZONES_PREVIEW = content[:500] + "..." if len(content) > 500 else content
+    try:
+        _ZONES_JSON = orjson.loads(_ZONES_RAW)
+    except orjson.JSONDecodeError:
+        _ZONES_JSON = None
+        return
+    
+    _ZONES_JSON_PREVIEW = _ZONES_JSON
+    if _ZONES_JSON and len(orjson.dumps(_ZONES_JSON)) > 1000:
+        indented = orjson.dumps(_ZONES_JSON, option=orjson.OPT_INDENT_2).decode()
+        _ZONES_JSON_PREVIEW = indented[:1000] + "..."
+    
+    location_ids = [
+        f["properties"]["LocationID"]
+        for f in _ZONES_JSON.get("features", [])
+        if "LocationID" in (f.get("properties") or {})
+    ]
+    _ZONES_MIN = min(location_ids, default=None)
+    _ZONES_MAX = max(location_ids, default=None)
+
+# Rows fetched per round-trip when streaming large result sets
+STREAM_YIELD_PER = 1000
+
+async def json_array_chunks(engine, query, params=None):
+    """Yield query rows as chunks of a JSON array using a server-side cursor."""
+    # The generator holds its own connection for the lifetime of the stream
+    async with engine.connect() as conn:
+        result = await conn.stream(
+            query.execution_options(yield_per=STREAM_YIELD_PER), params
+        )
+        prefix = b"["
+        async for rows in result.mappings().partitions():
+            # Row keys are SQLAlchemy quoted_name objects, not plain str
+            yield prefix + b",".join(
+                orjson.dumps(dict(row), option=orjson.OPT_NON_STR_KEYS) for row in rows
+            )
+            prefix = b","
+        yield b"]" if prefix == b"," else b"[]"
+
+async def stream_json_rows(engine, query, params=None):
+    """Start streaming query rows as a JSON array.
+
+    The query runs and its first batch is read before this returns, so database
+    errors raise here, while an error response can still be sent.
+    """
+    chunks = json_array_chunks(engine, query, params)
+    first = await anext(chunks)
+
+    async def body():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    return body()
+
+def next_page_headers(request, limit, offset):
+    """Build a Link header pointing at the page after this one."""
+    next_url = request.url.include_query_params(limit=limit, offset=offset + limit)
+    return {"Link": f'<{next_url}>; rel="next"'}
+
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database tables on startup."""
+    """Create the engine and initialize tables, local store and taxi zones on startup."""
     try:
+        load_taxi_zones()
+    except Exception as e:
+        # Only the zone debug endpoints depend on this file
+        print(f"Failed to load taxi zones: {e}")
+    try:
+        # Connect before serving so request handlers never create the engine
+        app.state.engine = await get_engine()
         await init_models()
+        # Serve the aggregate tables from memory, reloading them in the background
+        await local_store.load_store(app.state.engine)
+        app.state.refresh_task = asyncio.create_task(
+            local_store.refresh_store(app.state.engine)
+        )
     except Exception as e:
         print(f"Failed to initialize database: {e}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the background reload and close the local store."""
+    refresh_task = getattr(app.state, "refresh_task", None)
+    if refresh_task is not None:
+        refresh_task.cancel()
+        try:
+            await refresh_task
+        except asyncio.CancelledError:
+            pass
+    local_store.close_store()
+
 @app.get("/api/demand")
-async def get_demand(hour: int, session: AsyncSession = Depends(get_session)):
-    """Get demand heatmap data for a specific hour."""
+async def get_demand(
+    request: Request,
+    hour: int,
+    limit: int = Query(500, ge=1, le=5000),
+    offset: int = Query(0, ge=0)
+):
+    """Get demand heatmap data for a specific hour, one page at a time."""
     try:
-        query = select(
-            demand_heatmap.c.PULocationID,
-            demand_heatmap.c.n_trips
-        ).where(demand_heatmap.c.pickup_hour == hour)
-        
-        result = await session.execute(query)
-        rows = result.fetchall()
+        # Read one row past the page to tell whether another page follows
+        rows = local_store.query(DEMAND_SQL, [hour, limit + 1, offset])
+        has_next = len(rows) > limit
+        rows = rows[:limit]
         
         if not rows:
             raise HTTPException(status_code=404, detail="No data found for this hour")
-            
-        return [
-            {
-                "PULocationID": row.PULocationID,
-                "n_trips": row.n_trips,
-            }
-            for row in rows
-        ]
+        
+        headers = next_page_headers(request, limit, offset) if has_next else None
+        return ORJSONResponse(rows, headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/tips")
-async def get_tips(session: AsyncSession = Depends(get_session)):
-    """Get tip trends data."""
+async def get_tips(
+    request: Request,
+    limit: int = Query(500, ge=1, le=5000),
+    offset: int = Query(0, ge=0)
+):
+    """Get a page of tip trends data, streamed as rows are read from the database."""
+    engine = request.app.state.engine
+    params = {"limit": limit, "offset": offset}
     try:
-        query = select(tip_trends)
-        result = await session.execute(query)
-        rows = result.fetchall()
-        
-        if not rows:
-            raise HTTPException(status_code=404, detail="No tip data found")
-            
-        return [
-            {
-                "PULocationID": row.PULocationID,
-                "payment_type": row.payment_type,
-                "avg_tip_pct": row.avg_tip_pct,
-                "n_trips": row.n_trips,
-            }
-            for row in rows
-        ]
+        # Headers go out before the rows are read, so probe for a next page first
+        async with engine.connect() as conn:
+            next_row = await conn.execute(TIPS_ROW_AT_STMT, {"offset": offset + limit})
+            has_next = next_row.first() is not None
+        body = await stream_json_rows(engine, TIPS_STMT, params)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    headers = next_page_headers(request, limit, offset) if has_next else None
+    return StreamingResponse(body, media_type="application/json", headers=headers)
 
 @app.get("/api/anomalies")
-async def get_anomalies(session: AsyncSession = Depends(get_session)):
+async def get_anomalies(request: Request):
     """Get fare anomalies data."""
     try:
-        query = select(fare_anomalies).order_by(fare_anomalies.c.fare_amount.desc()).limit(100)
-        result = await session.execute(query)
-        rows = result.fetchall()
+        async with request.app.state.engine.connect() as conn:
+            rows = (await conn.execute(ANOMALIES_STMT)).mappings().all()
         
         if not rows:
             raise HTTPException(status_code=404, detail="No anomaly data found")
             
-        return [
-            {
-                "VendorID": row.VendorID,
-                "pickup_datetime": row.tpep_pickup_datetime.isoformat(),
-                "PULocationID": row.PULocationID,
-                "DOLocationID": row.DOLocationID,
-                "fare_amount": row.fare_amount,
-                "tip_amount": row.tip_amount,
-                "trip_distance": row.trip_distance,
-            }
-            for row in rows
-        ]
+        return ORJSONResponse([dict(row) for row in rows])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/debug/schema")
-async def get_schema(session: AsyncSession = Depends(get_session)):
+async def get_schema(request: Request):
     """Debug endpoint to inspect table structure."""
     try:
-        engine = await get_engine()
-        async with engine.begin() as conn:
-            def get_table_info(conn):
-                inspector = inspect(conn)
-                tables = ["demand_heatmap", "tip_trends", "fare_anomalies"]
-                schema = {}
-                for table in tables:
-                    try:
-                        columns = inspector.get_columns(table)
-                        schema[table] = [{"name": col["name"], "type": str(col["type"])} for col in columns]
-                    except Exception as e:
-                        schema[table] = f"Error: {str(e)}"
-                return schema
-            
-            schema = await conn.run_sync(get_table_info)
-            return schema
+        # Read all tables' columns from information_schema in one round-trip
+        async with request.app.state.engine.connect() as conn:
+            rows = (await conn.execute(SCHEMA_STMT)).fetchall()
+        columns = {name: [] for name in SCHEMA_TABLES}
+        for table_name, column_name, column_type in rows:
+            columns[table_name].append({"name": column_name, "type": column_type.upper()})
+        
+        return {
+            name: cols if cols else f"Error: table {name} not found"
+            for name, cols in columns.items()
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/debug/locations")
-async def get_locations(session: AsyncSession = Depends(get_session)):
+async def get_locations(request: Request):
     """Debug endpoint to show unique PULocationID values."""
     try:
-        # Get unique PULocationIDs from demand_heatmap
-        query = select(distinct(demand_heatmap.c.PULocationID)).order_by(demand_heatmap.c.PULocationID)
-        result = await session.execute(query)
-        demand_locations = [row[0] for row in result.fetchall()]
-        
-        # Get unique PULocationIDs from tip_trends
-        query = select(distinct(tip_trends.c.PULocationID)).order_by(tip_trends.c.PULocationID)
-        result = await session.execute(query)
-        tip_locations = [row[0] for row in result.fetchall()]
+        # Fetch unique PULocationIDs from all three tables in one round-trip,
+        # tagging each row with the table it came from
+        sources = {
+            "demand_heatmap": demand_heatmap,
+            "tip_trends": tip_trends,
+            "fare_anomalies": fare_anomalies,
+        }
+        query = union_all(*[
+            select(literal(name).label("src"), table.c.PULocationID).distinct()
+            for name, table in sources.items()
+        ]).order_by("PULocationID")
+        async with request.app.state.engine.connect() as conn:
+            rows = (await conn.execute(query)).fetchall()
         
-        # Get unique PULocationIDs from fare_anomalies
-        query = select(distinct(fare_anomalies.c.PULocationID)).order_by(fare_anomalies.c.PULocationID)
-        result = await session.execute(query)
-        anomaly_locations = [row[0] for row in result.fetchall()]
+        locations = {name: [] for name in sources}
+        for src, location_id in rows:
+            locations[src].append(location_id)
         
         return {
-            "demand_heatmap_locations": demand_locations,
-            "tip_trends_locations": tip_locations,
-            "fare_anomalies_locations": anomaly_locations
+            "demand_heatmap_locations": locations["demand_heatmap"],
+            "tip_trends_locations": locations["tip_trends"],
+            "fare_anomalies_locations": locations["fare_anomalies"]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -158,18 +375,13 @@ async def get_locations(session: AsyncSession = Depends(get_session)):
 @app.get("/api/debug/taxi-zones-sample")
 async def get_taxi_zones_sample():
     """Debug endpoint to show a sample of taxi zones data."""
+    if _ZONES_JSON is None:
+        raise HTTPException(status_code=404, detail="Taxi zones file not found")
+    
     try:
-        # Read the taxi zones GeoJSON file
-        zones_file = Path("frontend/src/assets/taxi_zones.geojson")
-        if not zones_file.exists():
-            raise HTTPException(status_code=404, detail="Taxi zones file not found")
-            
-        with open(zones_file) as f:
-            zones_data = json.load(f)
-            
         # Get a sample of location IDs
         location_ids = []
-        for feature in zones_data["features"][:10]:  # First 10 features
+        for feature in _ZONES_JSON["features"][:10]:  # First 10 features
             if "properties" in feature and "LocationID" in feature["properties"]:
                 location_ids.append({
                     "LocationID": feature["properties"]["LocationID"],
@@ -179,10 +391,10 @@ async def get_taxi_zones_sample():
                 
         return {
             "sample_location_ids": location_ids,
-            "total_features": len(zones_data["features"]),
+            "total_features": len(_ZONES_JSON["features"]),
             "location_id_range": {
-                "min": min(f["properties"]["LocationID"] for f in zones_data["features"]),
-                "max": max(f["properties"]["LocationID"] for f in zones_data["features"])
+                "min": _ZONES_MIN,
+                "max": _ZONES_MAX
             }
         }
     except Exception as e:
@@ -191,42 +403,20 @@ async def get_taxi_zones_sample():
 @app.get("/api/debug/taxi-zones-raw")
 async def get_taxi_zones_raw():
     """Debug endpoint to read the raw taxi zones GeoJSON file."""
-    # Try multiple possible paths
-    possible_paths = [
-        Path("frontend/public/taxi_zones.geojson"),  # Local development
-        Path("/app/frontend/public/taxi_zones.geojson"),  # Docker container
-        Path("../frontend/public/taxi_zones.geojson"),  # Relative to backend
-    ]
-    
-    file_path = None
-    for path in possible_paths:
-        if path.exists():
-            file_path = path
-            break
-    
-    if not file_path:
-        attempted_paths = [str(p) for p in possible_paths]
+    if _ZONES_RAW is None:
+        attempted_paths = [str(p) for p in TAXI_ZONES_PATHS]
         raise HTTPException(
             status_code=404,
             detail=f"Taxi zones file not found. Attempted paths: {', '.join(attempted_paths)}"
         )
     
     try:
-        content = file_path.read_text()
-        # Validate JSON
-        try:
-            json_data = json.loads(content)
-            is_valid_json = True
-        except json.JSONDecodeError:
-            is_valid_json = False
-            json_data = None
-        
         return {
-            "file_path": str(file_path),
-            "file_size": file_path.stat().st_size,
-            "preview": content[:500] + "..." if len(content) > 500 else content,
-            "is_valid_json": is_valid_json,
-            "json_preview": json.dumps(json_data, indent=2)[:1000] + "..." if json_data and len(json.dumps(json_data)) > 1000 else json_data
+            "file_path": str(_ZONES_PATH),
+            "file_size": len(_ZONES_RAW),
+            "preview": _ZONES_PREVIEW,
+            "is_valid_json": _ZONES_JSON is not None,
+            "json_preview": _ZONES_JSON_PREVIEW
         }
     except Exception as e:
         raise HTTPException(
@@ -235,56 +425,35 @@ async def get_taxi_zones_raw():
         )
 
 @app.get("/api/tips/{zone_id}")
-async def get_tip_for_zone(zone_id: int, session: AsyncSession = Depends(get_session)):
+async def get_tip_for_zone(zone_id: int):
     """Get average tip for a specific zone."""
-    query = select(tip_trends).where(tip_trends.c.PULocationID == zone_id)
-    result = await session.execute(query)
-    rows = result.fetchall()
-    if not rows:
+    avg_tip = local_store.query(TIP_FOR_ZONE_SQL, [zone_id])[0]["average"]
+    if avg_tip is None:
         raise HTTPException(status_code=404, detail="No tip data found for this zone")
-    # Average across all payment types for this zone
-    avg_tip = sum(row.avg_tip_pct for row in rows) / len(rows)
-    return {"average": avg_tip}
+    return ORJSONResponse({"average": avg_tip})
 
 @app.get("/api/trip-performance/{zone_id}")
 async def get_trip_performance(
     zone_id: int,
     hour: int | None = None,
-    is_weekend: bool | None = None,
-    session: AsyncSession = Depends(get_session)
+    is_weekend: bool | None = None
 ):
     """Get trip performance metrics for a specific zone."""
     try:
-        conditions = [trip_performance.c.PULocationID == zone_id]
+        sql = TRIP_PERFORMANCE_SQL
+        params = [zone_id]
         if hour is not None:
-            conditions.append(trip_performance.c.pickup_hour == hour)
+            sql += " AND pickup_hour = ?"
+            params.append(hour)
         if is_weekend is not None:
-            conditions.append(trip_performance.c.is_weekend == is_weekend)
+            sql += f" AND pickup_dow {'IN' if is_weekend else 'NOT IN'} ({WEEKEND_DAYS_SQL})"
             
-        query = select(trip_performance).where(and_(*conditions))
-        result = await session.execute(query)
-        rows = result.fetchall()
+        rows = local_store.query(sql, params)
         
         if not rows:
             raise HTTPException(status_code=404, detail="No trip performance data found")
             
-        return [
-            {
-                "pickup_hour": row.pickup_hour,
-                "pickup_dow": row.pickup_dow,
-                "avg_trip_duration": row.avg_trip_duration,
-                "avg_speed": row.avg_speed,
-                "avg_revenue_per_mile": row.avg_revenue_per_mile,
-                "avg_fare": row.avg_fare,
-                "total_revenue": row.total_revenue,
-                "n_trips": row.n_trips,
-                "avg_trip_distance": row.avg_trip_distance,
-                "avg_tip": row.avg_tip,
-                "avg_tip_percentage": row.avg_tip_percentage,
-                "is_weekend": row.is_weekend
-            }
-            for row in rows
-        ]
+        return ORJSONResponse(rows)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -292,73 +461,45 @@ async def get_trip_performance(
 async def get_popular_routes(
     zone_id: int,
     hour: int | None = None,
-    limit: int = 10,
-    session: AsyncSession = Depends(get_session)
+    limit: int = 10
 ):
     """Get popular routes from a specific zone."""
     try:
-        conditions = [popular_routes.c.PULocationID == zone_id]
+        sql = POPULAR_ROUTES_SQL
+        params = [zone_id]
         if hour is not None:
-            conditions.append(popular_routes.c.pickup_hour == hour)
+            sql += " AND pickup_hour = ?"
+            params.append(hour)
+        sql += " ORDER BY n_trips DESC LIMIT ?"
+        params.append(limit)
             
-        query = (
-            select(popular_routes)
-            .where(and_(*conditions))
-            .order_by(desc(popular_routes.c.n_trips))
-            .limit(limit)
-        )
-        result = await session.execute(query)
-        rows = result.fetchall()
+        rows = local_store.query(sql, params)
         
         if not rows:
             raise HTTPException(status_code=404, detail="No popular routes found")
             
-        return [
-            {
-                "DOLocationID": row.DOLocationID,
-                "pickup_hour": row.pickup_hour,
-                "n_trips": row.n_trips,
-                "avg_duration": row.avg_duration,
-                "avg_fare": row.avg_fare,
-                "avg_distance": row.avg_distance,
-                "avg_tip": row.avg_tip
-            }
-            for row in rows
-        ]
+        return ORJSONResponse(rows)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/payment-analysis/{zone_id}")
 async def get_payment_analysis(
     zone_id: int,
-    hour: int | None = None,
-    session: AsyncSession = Depends(get_session)
+    hour: int | None = None
 ):
     """Get payment analysis for a specific zone."""
     try:
-        conditions = [payment_analysis.c.PULocationID == zone_id]
+        sql = PAYMENT_ANALYSIS_SQL
+        params = [zone_id]
         if hour is not None:
-            conditions.append(payment_analysis.c.pickup_hour == hour)
+            sql += " AND pickup_hour = ?"
+            params.append(hour)
             
-        query = select(payment_analysis).where(and_(*conditions))
-        result = await session.execute(query)
-        rows = result.fetchall()
+        rows = local_store.query(sql, params)
         
         if not rows:
             raise HTTPException(status_code=404, detail="No payment analysis data found")
             
-        return [
-            {
-                "pickup_hour": row.pickup_hour,
-                "payment_type": row.payment_type,
-                "payment_method": row.payment_method,
-                "n_trips": row.n_trips,
-                "avg_fare": row.avg_fare,
-                "avg_tip": row.avg_tip,
-                "avg_tip_percentage": row.avg_tip_percentage,
-                "total_revenue": row.total_revenue
-            }
-            for row in rows
-        ]
+        return ORJSONResponse(rows)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -1,10 +1,8 @@
-from sqlalchemy import MetaData, Table, Column, Integer, Float, DateTime, String, BigInteger, Boolean
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import declarative_base
+from sqlalchemy import MetaData, Table, Column, Index, Integer, Float, DateTime, String, BigInteger
+from sqlalchemy.exc import OperationalError
 from .db import get_engine
 
 metadata = MetaData()
-Base = declarative_base(metadata=metadata)
 
 # Define tables to match actual database schema
 demand_heatmap = Table(
@@ -51,10 +49,12 @@ trip_performance = Table(
     Column("n_trips", BigInteger),
     Column("avg_trip_distance", Float),
     Column("avg_tip", Float),
-    Column("avg_tip_percentage", Float),
-    Column("is_weekend", Boolean)
+    Column("avg_tip_percentage", Float)
 )
 
+# pickup_dow values (0 = Monday) that fall on a weekend
+WEEKEND_DAYS = (5, 6)
+
 popular_routes = Table(
     "popular_routes",
     metadata,
@@ -82,14 +82,35 @@ payment_analysis = Table(
     Column("payment_method", String(20))
 )
 
+# Written by the batch pipeline each time it refreshes an aggregate table
+pipeline_runs = Table(
+    "pipeline_runs",
+    metadata,
+    Column("table_name", String(64), primary_key=True),
+    Column("refreshed_at", DateTime),
+)
+
+# Secondary indexes for queries still served from MySQL; the other aggregate
+# tables are read in full into the local store
+# Serves ORDER BY fare_amount DESC LIMIT n as an index range scan
+Index("ix_fare_amount_desc", fare_anomalies.c.fare_amount.desc())
+
+# MySQL error code for "Duplicate key name"
+ER_DUP_KEYNAME = 1061
+
+def create_indexes(conn):
+    """Create any missing indexes, including on pre-existing tables."""
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(conn, checkfirst=True)
+            except OperationalError as e:
+                # Another process created it after the existence check
+                if e.orig.args[0] != ER_DUP_KEYNAME:
+                    raise
+
 async def init_models():
     """Initialize database tables."""
     engine = await get_engine()
     async with engine.begin() as conn:
         await conn.run_sync(metadata.create_all)
-
-async def get_session() -> AsyncSession:
-    """Get a database session."""
-    engine = await get_engine()
-    async with AsyncSession(engine) as session:
-        yield session 
\ No newline at end of file
@@ -0,0 +1,55 @@
+import os
+
+# app.db reads credentials at import; the tests point the app at SQLite instead
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASS", "test")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from app.models import metadata, tip_trends
+
+TIP_ROWS = [
+    {"PULocationID": location_id, "payment_type": 1, "avg_tip_pct": 12.5, "n_trips": location_id * 10}
+    for location_id in range(1, 4)
+]
+
+def use_database(path):
+    """Point the app at a SQLite database file, without running startup."""
+    app.state.engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    return TestClient(app)
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "taxi.db"
+    engine = create_engine(f"sqlite:///{path}")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(tip_trends.insert(), TIP_ROWS)
+    engine.dispose()
+    return use_database(path)
+
+def test_tips_streams_json_rows(client):
+    response = client.get("/api/tips")
+    assert response.status_code == 200
+    assert response.json() == TIP_ROWS
+
+def test_tips_pages(client):
+    assert client.get("/api/tips?limit=2&offset=1").json() == TIP_ROWS[1:3]
+    assert client.get("/api/tips?offset=10").json() == []
+
+def test_tips_query_error_returns_500(tmp_path):
+    # No tables, so the query fails before any of the body is sent
+    client = use_database(tmp_path / "empty.db")
+    response = client.get("/api/tips")
+    assert response.status_code == 500
+    assert "tip_trends" in response.json()["detail"]
+
+def test_tips_links_next_page(client):
+    response = client.get("/api/tips?limit=2")
+    assert response.headers["Link"] == '<http://testserver/api/tips?limit=2&offset=2>; rel="next"'
+    assert "Link" not in client.get("/api/tips?limit=2&offset=1").headers